@@ -1,16 +1,73 @@
 import os
-import requests
+import re
+import json
+import time
+import asyncio
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+import httpx
 import pandas as pd
-import dns.resolver
+import dns.asyncresolver
+import dns.exception
 import whois
 from datetime import datetime
 import streamlit as st
 
+# Optional (pip install google-re2): its DFA matcher scans in time linear in the input no matter
+# how many parking keywords there are; only used for PARKING_RE
+try:
+    import re2
+except ImportError:
+    re2 = None
+
 # Known parking-related keywords in name servers
 PARKING_KEYWORDS = [
     "parkingcrew", "sedoparking", "bodis", "afternic", "above", "uniregistry",
     "domaincontrol", "cashparking", "namebright", "namestore"
 ]
+# Name servers are lower-cased once at lookup time, so the pattern can match case-sensitively
+PARKING_PATTERN = "|".join(map(re.escape, PARKING_KEYWORDS))
+PARKING_RE = re2.compile(PARKING_PATTERN) if re2 else re.compile(PARKING_PATTERN)
+
+# Number of domains checked concurrently; every check is network-bound
+MAX_CONCURRENT_DOMAINS = 100
+
+# Waiting for a free pooled connection is not the server's fault, so only network phases are timed
+HTTP_TIMEOUT = httpx.Timeout(5.0, pool=None)
+HTTP_LIMITS = httpx.Limits(max_connections=MAX_CONCURRENT_DOMAINS,
+                           max_keepalive_connections=MAX_CONCURRENT_DOMAINS)
+HTTP_HEADERS = {"User-Agent": "DomainStatusChecker/1.0"}
+
+# RDAP bootstrap service; redirects each query to the registry that is authoritative for the TLD
+RDAP_URL = "https://rdap.org/domain/{domain}"
+RDAP_HEADERS = {"Accept": "application/rdap+json"}
+
+# Lookup results are kept on disk between runs, so repeat runs only look up new or stale domains
+CACHE_PATH = os.path.expanduser("~/.cache/domain_checker/cache.db")
+CACHE_TTLS = {
+    "http": 60 * 60,
+    "ns": 6 * 60 * 60,
+    "expiry": 7 * 24 * 60 * 60,  # expiration dates change at most yearly
+}
+# Domains per cache SELECT, keeping the bound parameters under SQLite's limit
+CACHE_QUERY_CHUNK = 500
+
+# Output columns, in display order; every result row carries exactly these keys
+RESULT_COLUMNS = ["Domain", "HTTP Status", "Name Servers", "Possibly Parked", "Expiration Date"]
+
+# Minimum seconds between partial result table refreshes while a batch runs
+RENDER_INTERVAL = 0.5
+
+# Shared resolver, configured once instead of re-reading /etc/resolv.conf on every lookup
+RESOLVER = dns.asyncresolver.Resolver(configure=False)
+RESOLVER.nameservers = ["1.1.1.1", "8.8.8.8"]
+RESOLVER.timeout = 1
+RESOLVER.lifetime = 2
+
+# Cap on in-flight DNS queries, so large batches don't overload the recursive resolvers
+MAX_CONCURRENT_DNS = 64
+DNS_RETRIES = 3
+DNS_BACKOFF = 0.5
 
 HTTP_STATUS_DESCRIPTIONS = {
     200: "OK",
@@ -21,76 +78,255 @@ HTTP_STATUS_DESCRIPTIONS = {
     500: "Internal Server Error"
 }
 
-# Get expiration date via WHOIS
-def get_expiration_date(domain):
+# Statuses meaning the server rejected HEAD itself (Method Not Allowed / Not Implemented)
+HEAD_UNSUPPORTED_STATUSES = {405, 501}
+
+# Open the on-disk lookup cache for a batch, creating it on first use; None if it can't be opened
+def open_cache():
+    try:
+        os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
+        # Used from worker threads, but only ever by one at a time
+        conn = sqlite3.connect(CACHE_PATH, check_same_thread=False)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache "
+            "(domain TEXT, kind TEXT, value TEXT, ts INTEGER, PRIMARY KEY (domain, kind))"
+        )
+        return conn
+    except (OSError, sqlite3.Error):
+        return None
+
+# Load every still-fresh cached result for the batch up front: (domain, kind) -> value
+def load_cache(conn, domains):
+    cache = {}
+    if conn is None:
+        return cache
+    now = time.time()
+    try:
+        for start in range(0, len(domains), CACHE_QUERY_CHUNK):
+            chunk = domains[start:start + CACHE_QUERY_CHUNK]
+            placeholders = ", ".join("?" * len(chunk))
+            query = f"SELECT domain, kind, value, ts FROM cache WHERE domain IN ({placeholders})"
+            rows = conn.execute(query, chunk)
+            for domain, kind, value, ts in rows:
+                if kind in CACHE_TTLS and now - ts < CACHE_TTLS[kind]:
+                    cache[(domain, kind)] = value
+    except sqlite3.Error:
+        pass
+    return cache
+
+# Write the batch's new lookup results back in a single transaction
+def save_cache(conn, cache_writes):
+    if conn is None or not cache_writes:
+        return
     try:
-        w = whois.whois(domain)
-        exp_date = w.expiration_date
-        if isinstance(exp_date, list):
-            exp_date = exp_date[0]
-        if isinstance(exp_date, datetime):
+        with conn:
+            conn.executemany("INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?)", cache_writes)
+    except sqlite3.Error:
+        pass
+
+# Pull the expiration event out of an RDAP domain response
+def parse_rdap_expiration(data):
+    for event in data.get("events", []):
+        if event.get("eventAction") == "expiration":
+            exp_date = datetime.fromisoformat(event["eventDate"].replace("Z", "+00:00"))
             return exp_date.strftime("%Y-%m-%d")
-        return "Unknown"
+    return "Unknown"
+
+# Get expiration date via WHOIS (blocking; python-whois has no async API, so run it in a thread)
+def get_whois_expiration_date(domain):
+    w = whois.whois(domain)
+    exp_date = w.expiration_date
+    if isinstance(exp_date, list):
+        exp_date = exp_date[0]
+    return exp_date.strftime("%Y-%m-%d") if isinstance(exp_date, datetime) else "Unknown"
+
+# Get expiration date via RDAP over the shared HTTP client, unless the batch cache already has it
+async def get_expiration_date(client, domain, cache, cache_writes):
+    if (domain, "expiry") in cache:
+        return cache[(domain, "expiry")]
+
+    try:
+        response = await client.get(RDAP_URL.format(domain=domain), headers=RDAP_HEADERS,
+                                    follow_redirects=True)
+        value = parse_rdap_expiration(response.json()) if response.status_code == 200 else None
     except Exception:
-        return "Lookup Failed"
+        value = None
 
-# Get HTTP status and description
-def check_http_status(domain):
-    urls = [f"http://{domain}", f"https://{domain}"]
-    for url in urls:
+    # rdap.org answers 404 for TLDs whose registry has no RDAP service (e.g. .de); WHOIS covers those
+    if value is None:
         try:
-            response = requests.get(url, timeout=5)
+            value = await asyncio.to_thread(get_whois_expiration_date, domain)
+        except Exception:
+            return "Lookup Failed"
+    cache_writes.append((domain, "expiry", value, int(time.time())))
+    return value
+
+# Get HTTP status code, using HEAD so the body is never downloaded
+async def fetch_status_code(client, url):
+    status = (await client.head(url)).status_code
+    # Some servers don't implement HEAD; only then pay for a GET, streamed so the body is still skipped
+    if status in HEAD_UNSUPPORTED_STATUSES:
+        async with client.stream("GET", url) as response:
             status = response.status_code
-            description = HTTP_STATUS_DESCRIPTIONS.get(status, "Other")
-            return f"{status} - {description}"
-        except requests.RequestException:
+    return status
+
+# Get HTTP status and description; HTTPS first, as most sites only redirect plain HTTP to it
+async def check_http_status(client, domain, cache, cache_writes):
+    if (domain, "http") in cache:
+        return cache[(domain, "http")]
+
+    urls = [f"https://{domain}", f"http://{domain}"]
+    for url in urls:
+        try:
+            status = await fetch_status_code(client, url)
+        # UnicodeError covers hosts httpx can't IDNA-encode, such as a malformed "xn--" label
+        except (httpx.HTTPError, httpx.InvalidURL, UnicodeError):
             continue
+        description = HTTP_STATUS_DESCRIPTIONS.get(status, "Other")
+        result = f"{status} - {description}"
+        cache_writes.append((domain, "http", result, int(time.time())))
+        return result
     return "No Response"
 
-# Get NS records
-def get_name_servers(domain):
+# Resolve NS records, backing off exponentially when the resolver times out
+async def resolve_ns(domain, dns_semaphore):
+    for attempt in range(DNS_RETRIES):
+        try:
+            async with dns_semaphore:
+                return await RESOLVER.resolve(domain, 'NS')
+        except dns.exception.Timeout:
+            if attempt == DNS_RETRIES - 1:
+                raise
+        await asyncio.sleep(DNS_BACKOFF * 2 ** attempt)
+
+# Get NS records, unless the batch cache already has them
+async def get_name_servers(domain, dns_semaphore, cache, cache_writes):
+    if (domain, "ns") in cache:
+        return json.loads(cache[(domain, "ns")])
+
     try:
-        answers = dns.resolver.resolve(domain, 'NS')
-        return sorted([str(r.target).strip('.') for r in answers])
+        answers = await resolve_ns(domain, dns_semaphore)
     except Exception:
         return []
+    ns_records = sorted([str(r.target).strip('.').lower() for r in answers])
+    cache_writes.append((domain, "ns", json.dumps(ns_records), int(time.time())))
+    return ns_records
 
-# Detect if NS is a parking provider
+# Detect if NS is a parking provider; expects lower-cased records as returned by get_name_servers
 def check_if_parked(ns_records):
-    return any(any(keyword in ns.lower() for keyword in PARKING_KEYWORDS) for ns in ns_records)
+    # One scan over a single joined buffer; keywords contain no spaces, so no match spans two records
+    return PARKING_RE.search(" ".join(ns_records)) is not None
+
+# Run selected checks on a single domain; the lookups are independent, so run them side by side
+async def process_single_domain(client, dns_semaphore, cache, cache_writes, domain, check_expiry,
+                                check_ns, check_park, check_http,
+                                skip_expiry_if_parked=False, skip_expiry_if_up=False):
+    result = {"Domain": domain}
+
+    # A skip option can only fire when the check it depends on is enabled
+    skip_if_parked = skip_expiry_if_parked and check_ns and check_park
+    skip_if_up = skip_expiry_if_up and check_http
+    # The registry lookup is the slowest; when it may be skipped, hold it back for the deciding result
+    defer_expiry = check_expiry and (skip_if_parked or skip_if_up)
+
+    http_task = ns_task = expiry_task = None
+    if check_http:
+        http_task = asyncio.ensure_future(check_http_status(client, domain, cache, cache_writes))
+    if check_ns:
+        ns_task = asyncio.ensure_future(get_name_servers(domain, dns_semaphore, cache, cache_writes))
+    if check_expiry and not defer_expiry:
+        expiry_task = asyncio.ensure_future(get_expiration_date(client, domain, cache, cache_writes))
+
+    skip_expiry = False
+    if defer_expiry:
+        # Wait only for the lookups the enabled options need; NS first, as it is usually the faster one
+        if skip_if_parked:
+            skip_expiry = check_if_parked(await ns_task)
+        if not skip_expiry and skip_if_up:
+            skip_expiry = (await http_task).startswith("200 ")
+        if not skip_expiry:
+            expiry_task = asyncio.ensure_future(
+                get_expiration_date(client, domain, cache, cache_writes))
 
-# Run selected checks on domain list
-def process_domains(domains, check_expiry, check_ns, check_park, check_http):
-    results = []
+    result["HTTP Status"] = await http_task if http_task else "Skipped"
 
-    for domain in domains:
-        result = {"Domain": domain}
+    if ns_task:
+        ns_records = await ns_task
+        result["Name Servers"] = ", ".join(ns_records) if ns_records else "N/A"
+    else:
+        ns_records = []
+        result["Name Servers"] = "Skipped"
 
-        if check_http:
-            result["HTTP Status"] = check_http_status(domain)
-        else:
-            result["HTTP Status"] = "Skipped"
+    if check_park and ns_records:
+        result["Possibly Parked"] = "Yes" if check_if_parked(ns_records) else "No"
+    elif check_park:
+        result["Possibly Parked"] = "N/A"
+    else:
+        result["Possibly Parked"] = "Skipped"
 
-        if check_ns:
-            ns_records = get_name_servers(domain)
-            result["Name Servers"] = ", ".join(ns_records) if ns_records else "N/A"
-        else:
-            ns_records = []
-            result["Name Servers"] = "Skipped"
+    if skip_expiry:
+        result["Expiration Date"] = "Not Queried"
+    else:
+        result["Expiration Date"] = await expiry_task if expiry_task else "Skipped"
 
-        if check_park and ns_records:
-            result["Possibly Parked"] = "Yes" if check_if_parked(ns_records) else "No"
-        elif check_park:
-            result["Possibly Parked"] = "N/A"
-        else:
-            result["Possibly Parked"] = "Skipped"
+    return result
 
-        if check_expiry:
-            result["Expiration Date"] = get_expiration_date(domain)
-        else:
-            result["Expiration Date"] = "Skipped"
+# Run selected checks on domain list on one event loop, at most MAX_CONCURRENT_DOMAINS at a time
+async def process_domains(domains, check_expiry, check_ns, check_park, check_http,
+                          skip_expiry_if_parked=False, skip_expiry_if_up=False, progress_bar=None,
+                          results_placeholder=None):
+    # Results are kept column-wise (one pre-sized list per output column), not as a dict per row;
+    # each domain's row is written at its input position, so the output keeps the input order
+    results = {column: [None] * len(domains) for column in RESULT_COLUMNS}
+    last_render = 0.0
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_DOMAINS)
+    dns_semaphore = asyncio.Semaphore(MAX_CONCURRENT_DNS)
+
+    # WHOIS fallback lookups block, so give them enough threads to keep up with the event loop
+    whois_executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_DOMAINS)
+    asyncio.get_running_loop().set_default_executor(whois_executor)
+
+    # One cache connection per batch: fresh results are read in bulk before any lookup starts,
+    # and new ones are collected in memory and written back together at the end
+    conn = await asyncio.to_thread(open_cache)
+    cache = await asyncio.to_thread(load_cache, conn, domains)
+    cache_writes = []
+
+    try:
+        # One pooled HTTP/2 client for the whole batch: TLS handshakes are reused, and requests to a
+        # shared host (e.g. a registry's RDAP server) are multiplexed over a single connection
+        async with httpx.AsyncClient(http2=True, limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT,
+                                     headers=HTTP_HEADERS) as client:
+            async def check(index, domain):
+                async with semaphore:
+                    try:
+                        result = await process_single_domain(
+                            client, dns_semaphore, cache, cache_writes, domain, check_expiry, check_ns,
+                            check_park, check_http, skip_expiry_if_parked, skip_expiry_if_up)
+                    except Exception:
+                        # One bad domain must not abort the batch; report it as a failed row instead
+                        result = {column: "Check Failed" for column in RESULT_COLUMNS}
+                        result["Domain"] = domain
+                return index, result
 
-        results.append(result)
+            tasks = [check(index, domain) for index, domain in enumerate(domains)]
+            for done, task in enumerate(asyncio.as_completed(tasks), start=1):
+                index, result = await task
+                for column in RESULT_COLUMNS:
+                    results[column][index] = result[column]
+                if progress_bar is not None:
+                    progress_bar.progress(done / len(tasks))
+                # Show rows as they arrive, throttled so large batches don't spend their time redrawing
+                render_due = time.monotonic() - last_render >= RENDER_INTERVAL
+                if results_placeholder is not None and render_due:
+                    # Rows still in flight are all-None; show only the finished ones
+                    results_placeholder.dataframe(pd.DataFrame(results).dropna(how="all"))
+                    last_render = time.monotonic()
+    finally:
+        # Keep whatever was looked up, even if the batch was cut short
+        await asyncio.to_thread(save_cache, conn, cache_writes)
+        if conn is not None:
+            conn.close()
 
     return results
 
@@ -104,23 +340,34 @@ def main():
     check_http = st.checkbox("🌍 HTTP Status Check", value=True)
     check_ns = st.checkbox("🧾 Name Server Lookup", value=True)
     check_park = st.checkbox("🚧 Parking Detection (from NS)", value=True)
-    check_expiry = st.checkbox("📆 Expiration Date (WHOIS)", value=True)
+    check_expiry = st.checkbox("📆 Expiration Date (RDAP, WHOIS fallback)", value=True)
+    skip_expiry_if_parked = st.checkbox("⏭️ Skip expiration lookup for domains detected as parked",
+                                        value=False)
+    skip_expiry_if_up = st.checkbox("⏭️ Skip expiration lookup for domains answering HTTP 200",
+                                    value=False)
 
     st.markdown("### ✍️ Enter domain names (one per line):")
     domain_input = st.text_area("Domains", height=200, placeholder="example.com\nmydomain.net")
 
     if st.button("✅ Run Checks"):
-        domains = [d.strip() for d in domain_input.splitlines() if d.strip()]
+        # Domains are case-insensitive; drop repeats so each is looked up once, keeping input order
+        lines = (d.strip().lower() for d in domain_input.splitlines())
+        domains = list(dict.fromkeys(d for d in lines if d))
         if not domains:
             st.warning("Please input at least one domain.")
             return
 
+        status = st.empty()
+        progress_bar = status.progress(0.0)
+        results_placeholder = st.empty()
         with st.spinner("Checking domains..."):
-            results = process_domains(domains, check_expiry, check_ns, check_park, check_http)
+            results = asyncio.run(process_domains(
+                domains, check_expiry, check_ns, check_park, check_http,
+                skip_expiry_if_parked, skip_expiry_if_up, progress_bar, results_placeholder))
             df = pd.DataFrame(results)
 
-        st.success("✅ Done!")
-        st.dataframe(df)
+        status.success("✅ Done!")
+        results_placeholder.dataframe(df)
 
         csv = df.to_csv(index=False).encode("utf-8")
         st.download_button("📥 Download Results as CSV", csv, "domain_check_results.csv", "text/csv")